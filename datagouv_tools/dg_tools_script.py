@@ -35,6 +35,42 @@ parser.add_argument('--user', help='user name')
 parser.add_argument('--password', help='user password')
 parser.add_argument('-p', '--path',
                     help='path to directory (sirene) of to file (fantoir)')
+parser.add_argument('--local-infile', action='store_true',
+                    help='mariadb: send the files to the server with LOAD '
+                         'DATA LOCAL INFILE')
+
+
+def _connect_pg(database: str, **kwargs):
+    import pg8000
+    return pg8000.connect(database=database, **kwargs)
+
+
+def _connect_mariadb(database: str, **kwargs):
+    import mysql.connector as mariadb
+    return mariadb.connect(database=database, **kwargs)
+
+
+def _connect_sqlite(database: str, **_kwargs):
+    import sqlite3
+    return sqlite3.connect(database)
+
+
+# each function imports its driver only when it's called
+CONNECT_BY_RDBMS = {
+    "pg": _connect_pg,
+    "postgres": _connect_pg,
+    "postgresql": _connect_pg,
+    "maria": _connect_mariadb,
+    "mariadb": _connect_mariadb,
+    "mysql": _connect_mariadb,
+    "sqlite": _connect_sqlite,
+    "sqlite3": _connect_sqlite,
+}
+
+IMPORT_BY_SOURCE = {
+    "sirene": import_sirene,
+    "fantoir": import_fantoir,
+}
 
 
 def main():
@@ -46,30 +82,22 @@ def main():
     if args.password is not None:
         kwargs["password"] = args.password
 
-    if args.rdbms in ("pg", "postgres", "postgresql"):
-        import pg8000
-        connection = pg8000.connect(database=args.database, **kwargs)
-    elif args.rdbms in ("maria", "mariadb", "mysql"):
-        import mysql.connector as mariadb
-        connection = mariadb.connect(database=args.database, **kwargs)
-    elif args.rdbms in ("sqlite", "sqlite3"):
-        import sqlite3
-        connection = sqlite3.connect(args.database)
-    else:
+    connect = CONNECT_BY_RDBMS.get(args.rdbms)
+    if connect is None:
         raise ValueError("Unknown RDBMS {}".format(args.rdbms))
+    if args.local_infile:
+        if connect is not _connect_mariadb:
+            raise ValueError("--local-infile is only available for MariaDB")
+        kwargs["allow_local_infile"] = True
+    import_source = IMPORT_BY_SOURCE.get(args.source)
+    if import_source is None:
+        raise ValueError("Unknown source {}".format(args.source))
 
+    connection = connect(args.database, **kwargs)
     path = Path(args.path)
-    if args.source == "sirene":
-        try:
-            import_sirene(connection, path, args.rdbms)
-        finally:
-            connection.commit()
-            connection.close()
-    elif args.source == "fantoir":
-        try:
-            import_fantoir(connection, path, args.rdbms)
-        finally:
-            connection.commit()
-            connection.close()
-    else:
-        raise ValueError("Unknown source {}".format(args.source))
+    try:
+        import_source(connection, path, args.rdbms,
+                      local_infile=args.local_infile)
+    finally:
+        connection.commit()
+        connection.close()
@@ -20,7 +20,8 @@
 #
 import csv
 from csv import QUOTE_ALL
-from typing import (Sequence, Mapping, Union, Iterator, io)
+from operator import itemgetter
+from typing import (Sequence, Mapping, Union, Iterator, Tuple, io)
 
 from datagouv_tools.util import to_standard
 
@@ -256,14 +257,16 @@ class FantoirField:
         self.description = description
         self.is_filler = is_filler
         self._db_name = to_standard(self.description)
+        self._end = start + length
+        self._slice = slice(start - 1, start - 1 + length)
 
     @property
     def end(self):
-        return self.start + self.length
+        return self._end
 
     @property
     def slice(self):
-        return slice(self.start - 1, self.start - 1 + self.length)
+        return self._slice
 
     @property
     def db_name(self):
@@ -278,19 +281,28 @@ class RecordFormat:
     def __init__(self, name: str, fields: Sequence[FantoirField]):
         self.name = name
         self.fields = fields
-        self.header = [f.db_name for f in self.fields if not f.is_filler]
-        self._slices = [f.slice for f in self.fields if not f.is_filler]
-        self._slice_by_name = {f.db_name: f.slice for f in self.fields if
-                               not f.is_filler}
+        data_fields = [f for f in self.fields if not f.is_filler]
+        self.header = tuple(f.db_name for f in data_fields)
+        self._slices = tuple(f.slice for f in data_fields)
+        # extract all the values of a line in one C call. With a single
+        # slice, itemgetter returns the value, not a 1-tuple
+        if len(self._slices) > 1:
+            self._get_values = itemgetter(*self._slices)
+        else:
+            slices = self._slices
+            self._get_values = lambda line: tuple(line[s] for s in slices)
+        self._slice_by_name = dict(zip(self.header, self._slices))
 
     def to_dict(self, line: str) -> Mapping[str, str]:
-        ret = {n: line[s] for n, s in zip(self.header, self._slices)}
+        ret = dict(zip(self.header, self._get_values(line)))
         ret["record_type"] = self.name
         return ret
 
+    def to_tuple(self, line: str) -> Tuple[str, ...]:
+        return self._get_values(line)
+
     def to_row(self, line: str) -> str:
-        return "\t".join([line[self._slices[i]].strip() for i, k in
-                          enumerate(self.header)]) + "\n"
+        return "\t".join(map(str.strip, self._get_values(line))) + "\n"
 
     def get(self, line: str, item: Union[int, slice, str]) -> str:
         if isinstance(item, (int, slice)):
@@ -385,18 +397,21 @@ VOIE_FORMAT = RecordFormat("voie", [
 RECORD_FORMATS = (HEADER_FORMAT, DIRECTION_FORMAT, COMMUNE_FORMAT, VOIE_FORMAT)
 
 
+# index: (line[3] is blank) + 2 * (line[7] is blank)
+_FORMAT_BY_BLANKS = (VOIE_FORMAT, DIRECTION_FORMAT, COMMUNE_FORMAT,
+                     DIRECTION_FORMAT)
+
+
 def get_record_format(line: str) -> RecordFormat:
     if line[0] == '\x00':
         return HEADER_FORMAT
-    elif line[3] == ' ':
-        return DIRECTION_FORMAT
-    elif line[7] == ' ':
-        return COMMUNE_FORMAT
-    else:
-        return VOIE_FORMAT
+    return _FORMAT_BY_BLANKS[(line[3] == ' ') + 2 * (line[7] == ' ')]
 
 
 class Record:
+    # one instance per line: no `__dict__`
+    __slots__ = ("_line", "_record_format")
+
     def __init__(self, record_format: RecordFormat, line: str):
         self._line = line
         self._record_format = record_format
@@ -404,6 +419,9 @@ class Record:
     def to_dict(self) -> Mapping[str, str]:
         return self._record_format.to_dict(self._line)
 
+    def to_tuple(self) -> Tuple[str, ...]:
+        return self._record_format.to_tuple(self._line)
+
     def to_row(self) -> str:
         return self._record_format.to_row(self._line)
 
@@ -413,6 +431,9 @@ class Record:
     def __getitem__(self, item) -> str:
         return self._record_format.get(self._line, item)
 
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_tuple())
+
 
 class fantoir_dialect(csv.Dialect):
     delimiter = '\t'
@@ -431,15 +452,32 @@ def parse(file: Union[str, io.TextIO]) -> Iterator[Record]:
             yield from FantoirParser(f).parse()
 
 
+def parse_dicts(file: Union[str, io.TextIO]) -> Iterator[Mapping[str, str]]:
+    """
+    Same as `parse`, but yield the dicts without building `Record`s.
+    """
+    if hasattr(file, 'read'):
+        yield from FantoirParser(file).parse_dicts()
+    else:
+        with open(file, encoding="ascii") as f:
+            yield from FantoirParser(f).parse_dicts()
+
+
 class FantoirParser:
     def __init__(self, f: Iterator[str]):
         self._f = f
 
     def parse(self) -> Iterator[Record]:
+        for record_format, line in self._formats_and_lines():
+            yield Record(record_format, line)
+
+    def parse_dicts(self) -> Iterator[Mapping[str, str]]:
+        for record_format, line in self._formats_and_lines():
+            yield record_format.to_dict(line)
+
+    def _formats_and_lines(self) -> Iterator[Tuple[RecordFormat, str]]:
         for line in self._f:
-            if line[:10] == '9999999999':  # last line
+            if line.startswith('9999999999'):  # last line
                 continue
             line = line.rstrip("\n")
-            record_format = get_record_format(line)
-            if record_format is not None and record_format:
-                yield Record(record_format, line)
+            yield get_record_format(line), line
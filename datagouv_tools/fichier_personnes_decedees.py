@@ -20,7 +20,7 @@
 import datetime as dt
 import enum
 import logging
-import re
+from operator import itemgetter
 from typing import Optional, Tuple, List, Iterable, Callable, Any, cast, \
     Dict
 
@@ -30,17 +30,17 @@ from datagouv_tools.sql.generic import FakeConnection, QueryProvider, \
 from datagouv_tools.sql.sql_type import SQLIndexTypes, SQLTypes
 from datagouv_tools.sql.sqlite import SQLiteQueryExecutor
 
-NOMS_PRENOMS_PATTERN = re.compile(r"^([^*]+)\*([^/]+)(/\s*)?$")
-
 
 class LenientDate:
+    __slots__ = ("year", "month", "day")
+
     def __init__(self, year: int, month: int, day: int):
         self.year = year
         self.month = month
         self.day = day
 
     def as_date(self) -> dt.date:
-        return dt.date(self.year, self.day, self.day)
+        return dt.date(self.year, self.month, self.day)
 
     def __repr__(self) -> str:
         return "LenientDate({}, {}, {})".format(self.year, self.month, self.day)
@@ -49,10 +49,14 @@ class LenientDate:
 class Sex(enum.Enum):
     M = 1
     F = 2
-    UNKNOWN = 2
+    UNKNOWN = 0
 
 
 class Deces:
+    __slots__ = ("nom", "prenoms", "sexe", "date_naiss", "code_lieu_naiss",
+                 "commune_naiss", "pays_naiss", "date_deces",
+                 "code_lieu_deces", "no_acte_deces")
+
     def __init__(
             self, nom: str, prenoms: List[str], sexe: Sex,
             date_naiss: LenientDate, code_lieu_naiss: str, commune_naiss: str,
@@ -71,35 +75,46 @@ class Deces:
         self.no_acte_deces = no_acte_deces
 
     def __repr__(self) -> str:
-        return "{}({})".format(self.__class__.__name__, self.__dict__)
+        return "{}({})".format(self.__class__.__name__, {
+            name: getattr(self, name) for name in self.__slots__})
+
+
+# the offsets are in characters: the file is UTF-8
+_get_values = itemgetter(
+    slice(0, 80),  # nom*prenoms/
+    slice(80, 81),  # sexe
+    slice(81, 89),  # date de naissance
+    slice(89, 94),  # code du lieu de naissance
+    slice(94, 124),  # commune de naissance
+    slice(124, 154),  # pays de naissance
+    slice(154, 162),  # date de décès
+    slice(162, 167),  # code du lieu de décès
+    slice(167, 176),  # numéro d'acte de décès
+)
 
 
 class InseeLineParser:
     def parse(self, line: str) -> Optional[Deces]:
-        nom_prenoms = line[:80].strip()
-        nom, prenoms = self._parse_nom_prenoms(nom_prenoms)
-        sexe = self._parse_sex(line[80:81])
-        date_naiss = self._parse_date(line[81:89])
-        code_lieu_naiss = line[89:94]
-        commune_naiss = line[94:124].strip()
-        pays_naiss = line[124:154].strip()
-        date_deces = self._parse_date(line[154:162])
-        code_lieu_deces = line[162:167]
-        no_acte_deces = line[167:176].strip()
-        d = Deces(nom, prenoms, sexe, date_naiss, code_lieu_naiss,
-                  commune_naiss, pays_naiss, date_deces,
-                  code_lieu_deces, no_acte_deces)
+        (nom_prenoms, sexe, date_naiss, code_lieu_naiss, commune_naiss,
+         pays_naiss, date_deces, code_lieu_deces,
+         no_acte_deces) = _get_values(line)
+        nom, prenoms = self._parse_nom_prenoms(nom_prenoms.strip())
+        d = Deces(nom, prenoms, self._parse_sex(sexe),
+                  self._parse_date(date_naiss), code_lieu_naiss,
+                  commune_naiss.strip(), pays_naiss.strip(),
+                  self._parse_date(date_deces), code_lieu_deces,
+                  no_acte_deces.strip())
         return d
 
     def _parse_nom_prenoms(self, s: str) -> Tuple[str, List[str]]:
-        m = NOMS_PRENOMS_PATTERN.match(s)
-        if m:
-            nom = m.group(1)
-            prenoms = m.group(2).split()
-        else:
-            nom = s
-            prenoms = []
-        return nom, prenoms
+        # "NOM*PRENOM1 PRENOM2/", the final slash is optional
+        nom, sep, prenoms = s.partition("*")
+        if nom and sep:
+            if prenoms.endswith("/"):
+                prenoms = prenoms[:-1]
+            if prenoms and "/" not in prenoms:
+                return nom, prenoms.split()
+        return s, []
 
     def _parse_sex(self, s: str) -> Sex:
         if s == "1":
@@ -148,6 +163,8 @@ def register(importer_context_factory: Callable[
 register(sqlite_context, "sqlite", "sqlite3")
 
 
+_NO_PRENOMS = (None,) * 8
+
 DECES_TABLE = SQLTable(
     name="deces",
     fields=[
@@ -183,12 +200,15 @@ def import_deces(connection, deces_path, rdbms):
     executor.create_table(DECES_TABLE)
     executor.prepare_copy(DECES_TABLE)
 
+    parse_nom_prenoms = InseeLineParser()._parse_nom_prenoms
+
     def _typed_reader():
         with deces_path.open("r", encoding="utf-8") as s:
             for line in s:
-                d = InseeLineParser().parse(line)
-                yield (d.nom,) + tuple(
-                    d.prenoms[:8] + [None] * (8 - len(d.prenoms)))
+                # only the names are stored: don't build the whole `Deces`
+                nom, prenoms = parse_nom_prenoms(line[:80].strip())
+                prenoms = tuple(prenoms[:8])
+                yield (nom,) + prenoms + _NO_PRENOMS[len(prenoms):]
 
     executor.insert_rows(DECES_TABLE, _typed_reader())
     executor.finalize_copy(DECES_TABLE)
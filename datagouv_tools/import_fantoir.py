@@ -4,9 +4,9 @@ import logging
 import queue
 import tempfile
 import threading
-from codecs import getreader
 from dataclasses import dataclass
 from datetime import datetime
+from io import TextIOWrapper
 from logging import Logger, getLogger
 from pathlib import Path
 from typing import Any, Callable, Iterable
@@ -16,7 +16,8 @@ from datagouv_tools.fantoir import (RecordFormat, HEADER_FORMAT,
                                     RECORD_FORMATS, get_record_format,
                                     fantoir_dialect)
 from datagouv_tools.import_generic import (ImporterContext,
-                                           ImporterThreadContext)
+                                           ImporterThreadContext,
+                                           context_options)
 from datagouv_tools.sql.generic import (SQLTable, SQLField, QueryExecutor,
                                         DefaultSQLTypeConverter,
                                         SQLIndexProvider, SQLIndex,
@@ -30,8 +31,14 @@ from datagouv_tools.sql.sqlite import SQLiteQueryExecutor
 from datagouv_tools.util import CSVStream
 
 create_thread = threading.Thread
+# number of csv lines sent at once to a consumer thread
+LINES_PER_BATCH = 10_000
+# number of batches waiting for a consumer thread
+QUEUE_SIZE = 8
+# buffer size of the temp files
+TEMP_BUFFER_SIZE = 1024 * 1024
 logging.basicConfig(level=logging.DEBUG,
-                    format=("%(asctime)s - %(name)s/%(file)s/%(funcName)s/"
+                    format=("%(asctime)s - %(name)s/%(filename)s/%(funcName)s/"
                             "%(lineno)d - %(levelname)s: %(message)s"))
 
 
@@ -44,7 +51,7 @@ def _import_with_threads(path_zipped, importer_context: ImporterThreadContext):
     thread_info_by_name = {}
     for record_format in RECORD_FORMATS:
         csv_stream = CSVStream(record_format.name, record_format.header,
-                               queue.Queue())
+                               queue.Queue(QUEUE_SIZE))
         thread_info = ThreadInfo(record_format, csv_stream)
         thread = create_thread(
             target=consumer_factory(importer_context, thread_info))
@@ -64,16 +71,25 @@ def _import_with_threads(path_zipped, importer_context: ImporterThreadContext):
 
 def dispatch_records_factory(path, thread_info_by_name):
     def dispatch_records():
+        lines_by_name = {name: [] for name in thread_info_by_name}
+
         def send_to(name, csv_line):
-            thread_info_by_name[name].csv_stream.send(csv_line)
+            lines = lines_by_name[name]
+            lines.append(csv_line)
+            if len(lines) >= LINES_PER_BATCH:
+                thread_info_by_name[name].csv_stream.send("".join(lines))
+                lines.clear()
 
         logger = getLogger("datagouv_tools")
 
         dispatcher = Dispatcher(logger, send_to)
         dispatcher.dispatch(path)
 
-        for name in thread_info_by_name:
-            send_to(name, None)
+        for name, lines in lines_by_name.items():
+            csv_stream = thread_info_by_name[name].csv_stream
+            if lines:
+                csv_stream.send("".join(lines))
+            csv_stream.send(None)
 
     return dispatch_records
 
@@ -95,9 +111,16 @@ def consumer_factory(import_context: ImporterThreadContext,
                                    dialect)
 
     def consumer():
-        query_executor = import_context.new_executor()
-        write_table(query_executor, record_format, copy_table)
-        query_executor.close()
+        try:
+            query_executor = import_context.new_executor()
+            try:
+                write_table(query_executor, record_format, copy_table)
+            finally:
+                query_executor.close()
+        finally:
+            # even if there is no connection, the producer must not be
+            # blocked on the bounded queue
+            thread_info.csv_stream.discard()
 
     return consumer
 
@@ -117,19 +140,32 @@ def _import_fantoir_with_temp(path_zipped: Path, importer_context: ImporterConte
 
 def dispatch_to_temp(path_zipped: Path):
     """
-    Dispatch lines to
-    :param path_zipped:
-    :return:
+    Dispatch lines to one temp file per record format. The header line is
+    dropped.
+
+    :param path_zipped: the path to the zipped FANTOIR file
+    :return: the temp path by record format name
     """
     temp_dir = tempfile.gettempdir()
     path_by_name = {
         record_format.name: Path(temp_dir, f"{record_format.name}.csv") for
-        record_format in RECORD_FORMATS}
-    stream_by_name = {name: open(path, "w", encoding="ascii") for name, path in
-                      path_by_name.items()}
+        record_format in RECORD_FORMATS if record_format != HEADER_FORMAT}
+    stream_by_name = {}
+    for record_format in RECORD_FORMATS:
+        if record_format == HEADER_FORMAT:
+            continue
+        stream = open(path_by_name[record_format.name], "w", encoding="ascii",
+                      buffering=TEMP_BUFFER_SIZE)
+        # the copy skips the first line
+        stream.write("\t".join(record_format.header) + "\n")
+        stream_by_name[record_format.name] = stream
+
+    write_by_name = {name: stream.write
+                     for name, stream in stream_by_name.items()}
+    write_by_name[HEADER_FORMAT.name] = lambda csv_line: None
 
     def send_to(name, csv_line):
-        stream_by_name[name].write(csv_line)
+        write_by_name[name](csv_line)
 
     logger = getLogger()
 
@@ -187,11 +223,17 @@ class Dispatcher:
         #        source.close()
 
     def _dispatch_byte_stream(self, stream):
-        f = getreader('ascii')(stream)
+        # TextIOWrapper decodes by blocks, unlike a codecs StreamReader
+        f = TextIOWrapper(stream, encoding='ascii')
         count = 0
         t = datetime.now()
+        # bind the per-format name and `to_row` once, not once per line
+        name_and_to_row_by_format = {
+            record_format: (record_format.name, record_format.to_row)
+            for record_format in RECORD_FORMATS}
+        send_to = self._send_to
         for line in f:
-            if line[:10] == '9999999999':  # last line
+            if line.startswith('9999999999'):  # last line
                 continue
             count += 1
             if count % 500_000 == 0:
@@ -199,11 +241,9 @@ class Dispatcher:
                 self._logger.debug(
                     f"{new_t} / {count} lines read in ({new_t - t})")
                 t = new_t
-            line = line.rstrip("\n")
-            record_format = get_record_format(line)
-            if record_format is not None and record_format:
-                csv_line = record_format.to_row(line)
-                self._send_to(record_format.name, csv_line)
+            # no need to remove the EOL: `to_row` strips every field
+            name, to_row = name_and_to_row_by_format[get_record_format(line)]
+            send_to(name, to_row(line))
 
 
 def write_table(executor: QueryExecutor, record_format: RecordFormat,
@@ -211,7 +251,8 @@ def write_table(executor: QueryExecutor, record_format: RecordFormat,
     table = get_table(record_format)
     executor.create_table(table)
     executor.prepare_copy(table)
-    executor.commit()
+    # no commit before the copy: a table created or truncated in the same
+    # transaction is loaded without WAL when wal_level=minimal
     copy_table(executor, table)
     executor.finalize_copy(table)
     executor.commit()
@@ -260,19 +301,22 @@ def sqlite_context(logger, connection):
 
 # Couldn't make sqlite_thread_context work.
 
-def mariadb_context(logger, connection):
+def mariadb_context(logger, connection, local_infile: bool = False):
     return ImporterContext(
         query_executor=MariaDBQueryExecutor(logger, connection,
-                                            MariaDBQueryProvider()),
+                                            MariaDBQueryProvider(
+                                                local_infile)),
         type_converter=DefaultSQLTypeConverter(),
         index_provider=FantoirSQLIndexProvider(),
     )
 
 
-def mariadb_thread_context(logger, new_connection):
+def mariadb_thread_context(logger, new_connection,
+                           local_infile: bool = False):
     return ImporterThreadContext(
         new_executor=lambda: MariaDBQueryExecutor(logger, new_connection(),
-                                                  MariaDBQueryProvider()),
+                                                  MariaDBQueryProvider(
+                                                      local_infile)),
         type_converter=DefaultSQLTypeConverter(),
         index_provider=FantoirSQLIndexProvider(),
     )
@@ -306,7 +350,16 @@ register(mariadb_context, "maria", "mariadb", "mysql")
 register_thread(mariadb_thread_context, "maria", "mariadb", "mysql")
 
 
-def import_fantoir(connection, fantoir_path, rdbms):
+def import_fantoir(connection, fantoir_path, rdbms,
+                   local_infile: bool = False):
+    """
+    :param connection: a DB-API v2 connection
+    :param fantoir_path: the path to the zipped FANTOIR file
+    :param rdbms: name of the RDBMS
+    :param local_infile: MariaDB only. If True, the client sends the files
+                         (`LOAD DATA LOCAL INFILE`) and the server doesn't
+                         have to read them. The connection must allow it.
+    """
     logger = logging.getLogger("datagouv_tools")
     if connection is None:
         connection = FakeConnection(logger)
@@ -318,11 +371,20 @@ def import_fantoir(connection, fantoir_path, rdbms):
         rdbms.casefold())
     if context_factory is None:
         raise ValueError(f"Unknown RDBMS '{rdbms}'")
-    importer_context = context_factory(logger, connection)
+    importer_context = context_factory(logger, connection,
+                                       **context_options(rdbms, local_infile))
     _import_fantoir_with_temp(fantoir_path, importer_context)
 
 
-def import_fantoir_thread(new_connection, fantoir_path, rdbms):
+def import_fantoir_thread(new_connection, fantoir_path, rdbms,
+                          local_infile: bool = False):
+    """
+    :param new_connection: a function that returns a new DB-API v2
+                           connection
+    :param fantoir_path: the path to the zipped FANTOIR file
+    :param rdbms: name of the RDBMS
+    :param local_infile: see `import_fantoir`
+    """
     logger = logging.getLogger("datagouv_tools")
     logger.debug("Import data with following parameters:"
                  "fantoir_path: %s, rdbms: %s",
@@ -331,7 +393,8 @@ def import_fantoir_thread(new_connection, fantoir_path, rdbms):
         rdbms.casefold())
     if context_factory is None:
         raise ValueError(f"Unknown RDBMS '{rdbms}'")
-    importer_thread_context = context_factory(logger, new_connection)
+    importer_thread_context = context_factory(
+        logger, new_connection, **context_options(rdbms, local_infile))
     _import_with_threads(fantoir_path, importer_thread_context)
 
 
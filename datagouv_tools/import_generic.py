@@ -18,7 +18,7 @@
 #
 #
 from dataclasses import dataclass
-from typing import Callable
+from typing import Callable, Mapping, Any
 
 from datagouv_tools.sql.generic import SQLTypeConverter, SQLIndexProvider, \
     QueryExecutor
@@ -41,3 +41,33 @@ class ImporterThreadContext:
     type_converter: SQLTypeConverter
     index_provider: SQLIndexProvider
     new_executor: Callable[[], QueryExecutor]
+
+
+# the RDBMS that accept the `local_infile` option
+LOCAL_INFILE_RDBMS = ("maria", "mariadb", "mysql")
+
+
+def context_options(rdbms: str, local_infile: bool = False
+                    ) -> Mapping[str, Any]:
+    """
+    >>> context_options("pg")
+    {}
+    >>> context_options("MariaDB", local_infile=True)
+    {'local_infile': True}
+    >>> context_options("pg", local_infile=True)
+    Traceback (most recent call last):
+    ...
+    ValueError: local_infile is only available for MariaDB
+
+    :param rdbms: name of the RDBMS
+    :param local_infile: if True, use `LOAD DATA LOCAL INFILE` (MariaDB)
+    :return: the keyword arguments to pass to a context factory. Only the
+             options that are set are returned: the factories of the
+             RDBMS that do not support an option don't accept it.
+    """
+    options = {}
+    if local_infile:
+        if rdbms.casefold() not in LOCAL_INFILE_RDBMS:
+            raise ValueError("local_infile is only available for MariaDB")
+        options["local_infile"] = True
+    return options
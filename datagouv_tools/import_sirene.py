@@ -26,12 +26,16 @@ base-sirene-des-entreprises-et-de-leurs-etablissements-siren-siret).
 import csv
 import logging
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import (Mapping, Iterable, Any, Optional, Iterator,
-                    Callable)
+                    Callable, TextIO, Sequence, Tuple)
 
-from datagouv_tools.import_generic import ImporterContext
+from datagouv_tools.import_generic import (ImporterContext,
+                                           ImporterThreadContext,
+                                           context_options)
 from datagouv_tools.sql.generic import (SQLField, SQLIndex, QueryProvider,
                                         QueryExecutor, FakeConnection,
                                         SQLIndexProvider, SQLTypeConverter,
@@ -45,7 +49,7 @@ from datagouv_tools.sql.sqlite import SQLiteQueryExecutor
 from datagouv_tools.util import to_snake
 
 logging.basicConfig(level=logging.DEBUG,
-                    format=("%(asctime)s - %(name)s/%(file)s/%(funcName)s/"
+                    format=("%(asctime)s - %(name)s/%(filename)s/%(funcName)s/"
                             "%(lineno)d - %(levelname)s: %(message)s"))
 
 
@@ -97,6 +101,7 @@ class DryRunQueryExecutor:
 #  SIRENE: these classes represent the SIRENE data and schema #
 ###############################################################
 ZIP_SUFFIX = "_utf8"
+PROCESSED_NAMES_CACHE_SIZE = 4096
 
 NAME = "Nom"
 LENGTH = 'Longueur'
@@ -121,6 +126,9 @@ class SchemaRow:
     A row as in the schema.
     No snake_case conversion
     """
+    __slots__ = ("table_name", "name", "type_name", "length", "rank",
+                 "caption")
+
     table_name: str
     name: str
     type_name: str
@@ -129,45 +137,66 @@ class SchemaRow:
     caption: str
 
 
+def read_schema_rows(table_name: str, schema: TextIO
+                     ) -> Iterator[SchemaRow]:
+    """
+    :param table_name: the table name
+    :param schema: the csv schema file
+    :return: the rows of the schema
+    """
+    reader = csv.reader(schema)
+    header = next(reader)
+    name_index, type_index, length_index, rank_index, caption_index = (
+        header.index(column) for column in (NAME, TYPE, LENGTH, RANK, CAPTION))
+    schema_row = SchemaRow
+    to_int = int
+    for row in reader:
+        yield schema_row(table_name, row[name_index], row[type_index],
+                         to_int(row[length_index]), to_int(row[rank_index]),
+                         row[caption_index])
+
+
 class SireneSchemaParser:
     """
     A parser for SIRENE csv schemas.
     """
 
-    def __init__(self, table_name: str, rows: Iterable[Mapping[str, str]],
+    def __init__(self, table_name: str, rows: Iterable[SchemaRow],
                  type_converter: SQLTypeConverter,
                  index_provider: SQLIndexProvider):
         """
         :param table_name: the table name
-        :param rows: rows of the csv file
+        :param rows: rows of the csv file (see `read_schema_rows`)
         :param type_converter: a provider for sql types
         :param index_provider: a provider for indices
         """
         self._table_name = table_name
-        self._rows = [SchemaRow(table_name, row[NAME],
-                                row[TYPE], int(row[LENGTH]),
-                                int(row[RANK]), row[CAPTION]) for row in rows]
+        self._rows = list(rows)
         self._type_converter = type_converter
         self._index_provider = index_provider
+        # the schema is immutable: build the fields and the indices once
+        self._fields = tuple(sorted(
+            SQLField(table_name=table_name, field_name=row.name,
+                     type=type_converter.get_type(row), rank=row.rank,
+                     length=row.length,
+                     comment=row.caption)
+            for row in self._rows))
+        self._indices = tuple(
+            index for index in index_provider.get_indices(self._fields)
+            if index.table_name == table_name)
+        self._table_by_process_names = {}
 
-    def get_fields(self) -> Iterable[SQLField]:
+    def get_fields(self) -> Sequence[SQLField]:
         """
         :return: orderd fields of the table (names are in snake_case)
         """
-        return sorted(
-            SQLField(table_name=self._table_name, field_name=row.name,
-                     type=self._type_converter.get_type(row), rank=row.rank,
-                     length=row.length,
-                     comment=row.caption)
-            for row in self._rows)
+        return self._fields
 
-    def get_indices(self) -> Iterable[SQLIndex]:
+    def get_indices(self) -> Sequence[SQLIndex]:
         """
         :return: indices to create for this table
         """
-        for index in self._index_provider.get_indices(self.get_fields()):
-            if index.table_name == self._table_name:
-                yield index
+        return self._indices
 
     @property
     def table_name(self):
@@ -175,13 +204,19 @@ class SireneSchemaParser:
 
     def get_table(self, process_names: Callable[[str], str]
                   ) -> SQLTable:
-        return SQLTable(
+        try:
+            return self._table_by_process_names[process_names]
+        except KeyError:
+            pass
+        table = SQLTable(
             name=process_names(self._table_name),
-            fields=[field.process(process_names) for field in
-                    self.get_fields()],
-            indices=[index.process(process_names) for index in
-                     self.get_indices()]
+            fields=tuple(field.process(process_names) for field in
+                         self._fields),
+            indices=tuple(index.process(process_names) for index in
+                          self._indices)
         )
+        self._table_by_process_names[process_names] = table
+        return table
 
 
 def data_sources(sirene_path: Path) -> Iterator[Source]:
@@ -200,6 +235,9 @@ def data_sources(sirene_path: Path) -> Iterator[Source]:
 # SIRENE - POSTGRES: the glue between SIRENE and Postgres #
 ###########################################################
 
+_INDEXED_PREFIXES = frozenset(("siren", "siret"))
+
+
 class SireneSQLIndexProvider(SQLIndexProvider):
     """
     Provide index for SIREN/SIRET and code postal
@@ -209,19 +247,23 @@ class SireneSQLIndexProvider(SQLIndexProvider):
         """
         :param extra_indices: indices to add
         """
-        self._extra_indices = extra_indices
+        self._extra_indices_by_table_name = {}
+        for index in extra_indices:
+            self._extra_indices_by_table_name.setdefault(
+                index.table_name, []).append(index)
 
     def get_indices(self, fields: Iterable[SQLField]) -> Iterable[SQLIndex]:
-        table_name = next((f.table_name for f in fields), None)
+        fields = list(fields)
+        if not fields:
+            return
+
         for field in fields:
-            if field.field_name[:5] in (
-                    "siren", "siret"):
+            if field.field_name[:5] in _INDEXED_PREFIXES:
                 yield SQLIndex(field.table_name, field.field_name,
                                SQLIndexTypes.HASH)
 
-        for index in self._extra_indices:
-            if index.table_name == table_name:
-                yield index
+        yield from self._extra_indices_by_table_name.get(
+            fields[0].table_name, ())
 
 
 SQL_TYPE_BY_SIRENE_TYPE = {
@@ -238,15 +280,19 @@ class PatchedPostgreSireneTypeToSQLTypeConverter(SQLTypeConverter[SchemaRow]):
         :param sql_type_by_sirene_type: the default mapping
         """
         self._sql_type_by_sirene_type = sql_type_by_sirene_type
+        # (table name, field name) -> type, checked before the default mapping
+        self._type_by_table_and_field_name = {
+            ('StockEtablissement', 'numeroVoieEtablissement'): SQLTypes.TEXT,
+        }
 
     def get_type(self, row: SchemaRow) -> SQLType:
-        t = self._sql_type_by_sirene_type[row.type_name]
-        if t == SQLTypes.DATE and row.length != 10:
-            t = SQLTypes.TEXT
+        t = self._type_by_table_and_field_name.get((row.table_name, row.name))
+        if t is not None:
+            return t
 
-        if (row.table_name == 'StockEtablissement'
-                and row.name == 'numeroVoieEtablissement'):
-            t = SQLTypes.TEXT
+        t = self._sql_type_by_sirene_type[row.type_name]
+        if t is SQLTypes.DATE and row.length != 10:
+            return SQLTypes.TEXT
         return t
 
 
@@ -283,7 +329,9 @@ class SireneImporter:
         self._logger = logger
         self._sources = sources
         self._importer_context = importer_context
-        self._process_names = process_names
+        # the same names (table name, siren, siret...) come again and again
+        self._process_names = lru_cache(maxsize=PROCESSED_NAMES_CACHE_SIZE)(
+            process_names)
         self._bulk_copy = bulk_copy
 
     def execute(self):
@@ -304,8 +352,8 @@ class SireneImporter:
 
     def _create_schema_parser(self, source: Source) -> SireneSchemaParser:
         with source.schema_path.open('r', encoding='utf-8') as schema:
-            reader = csv.DictReader(schema)
-            parser = SireneSchemaParser(source.table_name, reader,
+            rows = read_schema_rows(source.table_name, schema)
+            parser = SireneSchemaParser(source.table_name, rows,
                                         self._importer_context.type_converter,
                                         self._importer_context.index_provider)
         return parser
@@ -321,7 +369,7 @@ class SireneImporter:
         executor.prepare_copy(table)
         self._logger.debug("Import data from file: %s",
                            source.zipped_data_path)
-        self._copy_from_zipped_file(source.zipped_data_path, parser,
+        self._copy_from_zipped_file(source.zipped_data_path, table,
                                     executor)
         self._logger.debug("After copy: %s", source.table_name)
         executor.finalize_copy(table)
@@ -329,12 +377,11 @@ class SireneImporter:
         executor.commit()
 
     def _copy_from_zipped_file(self, zipped_path: Path,
-                               parser: SireneSchemaParser,
+                               table: SQLTable,
                                executor: QueryExecutor):
         # TODO: copier (PgCopier, MariaDBCopier, SqliteCopier)
         with zipfile.ZipFile(zipped_path, 'r') as zipdata:
             data_stream = self._get_stream(zipdata)
-            table = parser.get_table(self._process_names)
             if self._bulk_copy:
                 executor.copy_stream(table, data_stream, "utf-8",
                                      csv.unix_dialect)
@@ -345,10 +392,14 @@ class SireneImporter:
     def _get_stream(self, zipdata):
         f = zipdata.filelist[0]
         data_stream = zipdata.open(f)
-        first_lines = [list(enumerate(data_stream.readline().strip().decode(
-            "utf-8").split(","), 1)) for _ in range(3)]
-        self._logger.debug("First lines are: %s", first_lines)
-        data_stream.seek(0)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            first_lines = [list(enumerate(
+                data_stream.readline().strip().decode("utf-8").split(","),
+                1)) for _ in range(3)]
+            self._logger.debug("First lines are: %s", first_lines)
+            # the first lines are usually still in the read buffer of the
+            # member: then, this seek does not decompress them again
+            data_stream.seek(0)
         return data_stream
 
 
@@ -357,10 +408,12 @@ class SireneImporter:
 ########
 
 
-def postgres_context(logger, connection):
-    return ImporterContext(
-        query_executor=PostgreSQLQueryExecutor(logger, connection,
-                                               PostgreSQLQueryProvider()),
+def _sirene_context_parameters() -> Mapping[str, Any]:
+    """
+    :return: the parameters shared by all SIRENE contexts, thread contexts
+             included.
+    """
+    return dict(
         type_converter=PatchedPostgreSireneTypeToSQLTypeConverter(
             SQL_TYPE_BY_SIRENE_TYPE),
         index_provider=SireneSQLIndexProvider(
@@ -369,28 +422,43 @@ def postgres_context(logger, connection):
     )
 
 
+def postgres_context(logger, connection):
+    return ImporterContext(
+        query_executor=PostgreSQLQueryExecutor(logger, connection,
+                                               PostgreSQLQueryProvider()),
+        **_sirene_context_parameters())
+
+
 def sqlite_context(logger, connection):
     return ImporterContext(
         query_executor=SQLiteQueryExecutor(logger, connection,
                                            QueryProvider()),
-        type_converter=PatchedPostgreSireneTypeToSQLTypeConverter(
-            SQL_TYPE_BY_SIRENE_TYPE),
-        index_provider=SireneSQLIndexProvider(
-            SQLIndex('StockEtablissement', "codePostalEtablissement",
-                     SQLIndexTypes.B_TREE)),
-    )
+        **_sirene_context_parameters())
 
 
-def mariadb_context(logger, connection):
+def mariadb_context(logger, connection, local_infile: bool = False):
     return ImporterContext(
         query_executor=MariaDBQueryExecutor(logger, connection,
-                                            MariaDBQueryProvider()),
-        type_converter=PatchedPostgreSireneTypeToSQLTypeConverter(
-            SQL_TYPE_BY_SIRENE_TYPE),
-        index_provider=SireneSQLIndexProvider(
-            SQLIndex('StockEtablissement', "codePostalEtablissement",
-                     SQLIndexTypes.B_TREE)),
-    )
+                                            MariaDBQueryProvider(
+                                                local_infile)),
+        **_sirene_context_parameters())
+
+
+def postgres_thread_context(logger, new_connection: Callable[[], Any]):
+    return ImporterThreadContext(
+        new_executor=lambda: PostgreSQLQueryExecutor(logger, new_connection(),
+                                                     PostgreSQLQueryProvider()
+                                                     ),
+        **_sirene_context_parameters())
+
+
+def mariadb_thread_context(logger, new_connection: Callable[[], Any],
+                           local_infile: bool = False):
+    return ImporterThreadContext(
+        new_executor=lambda: MariaDBQueryExecutor(logger, new_connection(),
+                                                  MariaDBQueryProvider(
+                                                      local_infile)),
+        **_sirene_context_parameters())
 
 
 _SIRENE_CONTEXT_FACTORY_BY_RDBMS = {}
@@ -403,26 +471,66 @@ def register(importer_context_factory: Callable[
         _SIRENE_CONTEXT_FACTORY_BY_RDBMS[rdbms] = importer_context_factory
 
 
+_SIRENE_THREAD_CONTEXT_FACTORY_BY_RDBMS = {}
+
+
+def register_thread(importer_thread_context_factory: Callable[
+    [logging.Logger, Callable[[], Any]], ImporterThreadContext],
+                    *rdbms_list: str):
+    for rdbms in rdbms_list:
+        _SIRENE_THREAD_CONTEXT_FACTORY_BY_RDBMS[
+            rdbms] = importer_thread_context_factory
+
+
 register(postgres_context, "pg", "postgres", "postgresql")
+register_thread(postgres_thread_context, "pg", "postgres", "postgresql")
 register(sqlite_context, "sqlite", "sqlite3")
 register(mariadb_context, "maria", "mariadb", "mysql")
+register_thread(mariadb_thread_context, "maria", "mariadb", "mysql")
 
 
 def import_sirene(connection: Any, sirene_path: Path, rdbms: str,
                   process_names: Optional[Callable[[str], str]] = to_snake,
-                  bulk_copy: bool = True):
+                  bulk_copy: bool = True, local_infile: bool = False):
     """
     :param sirene_path: the path to sirene dir
     :param connection: a DB-API v2 connection
     :param rdbms: name of the RDBMS
     :param process_names: a function to process the names
     :param bulk_copy: if True, use bulk copy if available
+    :param local_infile: MariaDB only. If True, the client sends the files
+                         (`LOAD DATA LOCAL INFILE`) and the server doesn't
+                         have to read them. The connection must allow it.
     """
-    assert sirene_path.exists()
     logger = logging.getLogger("datagouv_tools")
-
     if connection is None:
         connection = FakeConnection(logger)
+    context_factory, process_names = _prepare_import(
+        logger, sirene_path, connection, rdbms, process_names,
+        _SIRENE_CONTEXT_FACTORY_BY_RDBMS)
+
+    importer_context = context_factory(logger, connection,
+                                       **context_options(rdbms, local_infile))
+    _import_sirene(logger, sirene_path, importer_context, process_names,
+                   bulk_copy)
+
+
+def _prepare_import(logger: logging.Logger, sirene_path: Path,
+                    connection: Any, rdbms: str,
+                    process_names: Optional[Callable[[str], str]],
+                    context_factory_by_rdbms: Mapping[str, Callable]
+                    ) -> Tuple[Callable, Callable[[str], str]]:
+    """
+    The preamble of `import_sirene` and `import_sirene_thread`.
+
+    :param sirene_path: the path to sirene dir
+    :param connection: the connection or the connection factory (logged)
+    :param rdbms: name of the RDBMS
+    :param process_names: a function to process the names, or None
+    :param context_factory_by_rdbms: the registered context factories
+    :return: the context factory and the function to process the names
+    """
+    assert sirene_path.exists()
     if process_names is None:
         def process_names(name: str) -> str: return name
 
@@ -430,13 +538,10 @@ def import_sirene(connection: Any, sirene_path: Path, rdbms: str,
                  "sirene_path: %s, connection: %s, rdbms: %s", sirene_path,
                  connection, rdbms)
 
-    context_factory = _SIRENE_CONTEXT_FACTORY_BY_RDBMS.get(rdbms.casefold())
+    context_factory = context_factory_by_rdbms.get(rdbms.casefold())
     if context_factory is None:
         raise ValueError(f"Unknown RDBMS '{rdbms}'")
-
-    importer_context = context_factory(logger, connection)
-    _import_sirene(logger, sirene_path, importer_context, process_names,
-                   bulk_copy)
+    return context_factory, process_names
 
 
 def _import_sirene(logger: logging.Logger, sirene_path: Path,
@@ -459,6 +564,76 @@ def _import_sirene(logger: logging.Logger, sirene_path: Path,
     importer.execute()
 
 
+def import_sirene_thread(new_connection: Callable[[], Any], sirene_path: Path,
+                         rdbms: str,
+                         process_names: Optional[
+                             Callable[[str], str]] = to_snake,
+                         bulk_copy: bool = True, local_infile: bool = False):
+    """
+    Import each SIRENE source in its own thread, with its own connection.
+
+    :param new_connection: a function that returns a new DB-API v2
+                           connection
+    :param sirene_path: the path to sirene dir
+    :param rdbms: name of the RDBMS
+    :param process_names: a function to process the names
+    :param bulk_copy: if True, use bulk copy if available
+    :param local_infile: see `import_sirene`
+    """
+    logger = logging.getLogger("datagouv_tools")
+    context_factory, process_names = _prepare_import(
+        logger, sirene_path, new_connection, rdbms, process_names,
+        _SIRENE_THREAD_CONTEXT_FACTORY_BY_RDBMS)
+
+    importer_thread_context = context_factory(
+        logger, new_connection, **context_options(rdbms, local_infile))
+    _import_sirene_with_threads(logger, sirene_path, importer_thread_context,
+                                process_names, bulk_copy)
+
+
+def _import_sirene_with_threads(
+        logger: logging.Logger, sirene_path: Path,
+        importer_thread_context: ImporterThreadContext,
+        process_names: Callable[[str], str], bulk_copy: bool = True):
+    """
+    :param sirene_path: path to data and schemas
+    :param importer_thread_context: objects to import data
+    :param process_names: a function to process field and table names
+    :param bulk_copy: if True, use bulk copy if available
+    """
+    import_sources = [_source_importer_factory(
+        logger, source, importer_thread_context, process_names, bulk_copy)
+        for source in data_sources(sirene_path)]
+    if not import_sources:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(import_sources)) as pool:
+        futures = [pool.submit(import_source)
+                   for import_source in import_sources]
+    # every source is done here: re-raise the first error, if any
+    for future in futures:
+        future.result()
+
+
+def _source_importer_factory(logger: logging.Logger, source: Source,
+                             importer_thread_context: ImporterThreadContext,
+                             process_names: Callable[[str], str],
+                             bulk_copy: bool):
+    def import_source():
+        query_executor = importer_thread_context.new_executor()
+        try:
+            importer_context = ImporterContext(
+                importer_thread_context.type_converter,
+                importer_thread_context.index_provider, query_executor)
+            importer = SireneImporter(logger, [source], importer_context,
+                                      process_names, bulk_copy)
+            importer.execute()
+        finally:
+            query_executor.close()
+
+    return import_source
+
+
 ########
 # MAIN #
 ########
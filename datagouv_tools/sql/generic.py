@@ -19,21 +19,27 @@
 #
 import os
 import shutil
+import stat
 import tempfile
 from abc import ABC, abstractmethod
-from codecs import getreader
 from csv import reader as csv_reader, Dialect
 from dataclasses import dataclass
-from io import BytesIO
-from itertools import chain
+from io import BytesIO, FileIO, TextIOWrapper
+from itertools import chain, islice
+from operator import itemgetter
 from pathlib import Path
 from typing import (Callable, Iterable, Generic, TypeVar, Any, BinaryIO,
-                    Collection, Tuple)
+                    Sequence, Tuple, Optional, Iterator, List)
 
 from datagouv_tools.sql.sql_type import SQLType, SQLIndexType, SQLTypes
 
 U = TypeVar('U')
 
+SPILL_BUFFER_SIZE = 1024 * 1024
+
+# remove the vowels of a name
+_VOWELS_TABLE = str.maketrans(dict.fromkeys('aeiou'))
+
 
 @dataclass(eq=True)
 class SQLField:
@@ -51,6 +57,7 @@ class SQLField:
     def __post_init__(self):
         if self.type_params is None:
             self.type_params = ()
+        self._type_str = self.type.to_str(*self.type_params)
 
     def process(self, process_names: Callable[[str], str]) -> "SQLField":
         return SQLField(process_names(self.table_name),
@@ -58,8 +65,8 @@ class SQLField:
                         self.comment, self.length)
 
     @property
-    def type_str(self):
-        return self.type.to_str(*self.type_params)
+    def type_str(self) -> str:
+        return self._type_str
 
     def type_value(self, value):
         return self.type.type_value(value)
@@ -69,11 +76,6 @@ class SQLField:
             raise ValueError("field from different tables are not comparable")
         return self.rank < other.rank
 
-    def __repr__(self):
-        return (f"SQLField({self.table_name}, {self.field_name}, {self.type}, "
-                f"{self.rank}, {self.comment}, {self.length}, "
-                f"{self.type_params})")
-
 
 F = TypeVar('F', bound=SQLField)
 
@@ -96,10 +98,9 @@ class SQLIndex:
         """
         :return: the name of the index, that is field name + table name + "idx"
         """
-        table = str.maketrans(dict.fromkeys('aeiou'))
         if len(self.field_name) + len(self.table_name) > 64:
-            table_name = self.table_name.translate(table)
-            field_name = self.field_name.translate(table)
+            table_name = self.table_name.translate(_VOWELS_TABLE)
+            field_name = self.field_name.translate(_VOWELS_TABLE)
         else:
             table_name = self.table_name
             field_name = self.field_name
@@ -114,14 +115,20 @@ class SQLIndex:
 @dataclass
 class SQLTable:
     name: str
-    fields: Collection[SQLField]
+    fields: Sequence[SQLField]
     indices: Iterable[SQLIndex]
 
+    def __post_init__(self):
+        # the fields are read several times: materialize them once
+        self.fields = tuple(self.fields)
+
 
 class QueryProvider(ABC):
     """
     A SQL query provider
     """
+    # number of rows sent to the driver in each `executemany` call
+    batch_size = 10_000
 
     def drop_table(self, table: SQLTable) -> Iterable[str]:
         return f'DROP TABLE IF EXISTS {table.name}',
@@ -130,39 +137,31 @@ class QueryProvider(ABC):
         """
         :return: a list of queries to create a table
         """
-        fields = list(table.fields)
+        fields = table.fields
         if not fields:
             return f'CREATE TABLE {table.name} ()',
 
         sql_type_max_size = max(len(f.type_str) for f in fields)
         name_max_size = max(len(f.field_name) for f in fields)
+        # the comma is part of the type column
+        line_format = (f"    {{:<{name_max_size}}} "
+                       f"{{:<{sql_type_max_size + 1}}}")
+        last_line_format = (f"    {{:<{name_max_size}}} "
+                            f"{{:<{sql_type_max_size}}}")
 
         lines = [f'CREATE TABLE {table.name} (']
-        for field in fields[:-1]:
-            lines.append(
-                self._create_line(field, name_max_size, sql_type_max_size, ',')
-            )
-        lines.append(
-            self._create_line(fields[-1], name_max_size,
-                              sql_type_max_size, ''))
+        lines.extend(self._create_line(line_format, field, ',')
+                     for field in fields[:-1])
+        lines.append(self._create_line(last_line_format, fields[-1], ''))
         lines.append(")")
         return "\n".join(lines),
 
-    def _create_line(self, field: F, name_max_size: int,
-                     sql_type_max_size: int, comma) -> str:
-        field_name = self._field_name(field, name_max_size)
-        field_type = self._type(field, sql_type_max_size, comma)
+    def _create_line(self, line_format: str, field: F, comma: str) -> str:
+        line = line_format.format(field.field_name, field.type_str + comma)
         if field.comment:
-            return f"    {field_name} {field_type} -- {field.comment}"
+            return f"{line} -- {field.comment}"
         else:
-            return f"    {field_name} {field_type}"
-
-    def _field_name(self, field: F, width) -> str:
-        return field.field_name.ljust(width)
-
-    def _type(self, field: SQLField, width, comma=','):
-        return (field.type_str + comma).ljust(
-            width + len(comma))
+            return line
 
     def prepare_copy(self, table: SQLTable) -> Iterable[str]:
         """
@@ -189,6 +188,11 @@ class QueryProvider(ABC):
 
 
 class QueryExecutor(ABC):
+    # True if the executor implements `copy_stream`
+    supports_stream = False
+    # True if the executor implements `copy_path`
+    supports_path = False
+
     @abstractmethod
     def execute(self, queries: Iterable[str], *args, **kwargs):
         pass
@@ -226,48 +230,103 @@ class QueryExecutor(ABC):
         self.execute(self.query_provider.prepare_copy(table))
 
     def copy_path(self, table: SQLTable, path: Path, encoding: str,
-                  dialect: Dialect, count=0):
+                  dialect: Dialect):
         """
-        create a new table
+        copy a file to the table. The default implementation opens the file
+        and calls `copy_stream`.
         """
-        if count > 1:
-            raise Exception(
+        if not self.supports_stream:
+            raise NotImplementedError(
                 "An executor should implement copy_stream or copy_path")
         with path.open("rb") as source:
-            self.copy_stream(table, source, encoding, dialect,
-                             count=count + 1)
+            self.copy_stream(table, source, encoding, dialect)
 
     def copy_stream(self, table: SQLTable, stream: BinaryIO, encoding: str,
-                    dialect: Dialect, count=0):
+                    dialect: Dialect):
         """
-        create a new table
+        copy a stream to the table. The default implementation calls
+        `copy_path`, and spills the stream to a temporary file only if the
+        stream is not a plain file.
         """
-        if count > 1:
-            raise Exception(
+        if not self.supports_path:
+            raise NotImplementedError(
                 "An executor should implement copy_stream or copy_path")
+        if self.reads_path_on_client():
+            path = _get_file_path(stream)
+            if path is not None:
+                self.copy_path(table, path, encoding, dialect)
+                return
+
         handle, temp_path = tempfile.mkstemp(suffix=".csv")
-        with os.fdopen(handle, "wb") as dest:
-            shutil.copyfileobj(stream, dest)
-            os.chmod(temp_path, 0o644)
+        try:
+            with os.fdopen(handle, "wb") as dest:
+                shutil.copyfileobj(stream, dest, SPILL_BUFFER_SIZE)
+                os.chmod(temp_path, 0o644)
 
-        self.copy_path(table, Path(temp_path), encoding, dialect,
-                       count=count + 1)
-        os.remove(temp_path)
+            self.copy_path(table, Path(temp_path), encoding, dialect)
+        finally:
+            os.remove(temp_path)
+
+    def reads_path_on_client(self) -> bool:
+        """
+        :return: True if the file passed to `copy_path` is read by the client.
+                 If it is read by the server, `copy_stream` always copies the
+                 stream to a temporary file that the server can read.
+        """
+        return True
 
     def insert_all(self, table: SQLTable, stream: BytesIO, encoding: str,
                    dialect: Dialect, count=0):
-        stream = getreader(encoding)(stream)
-        reader = csv_reader(stream, dialect)
-        next(reader)
-        table_fields = table.fields
-        typed_reader = (tuple(field.type_value(value)
-                              for field, value in zip(table_fields, row))
-                        for row in reader)
-        self.insert_rows(table, typed_reader)
+        field_count = len(table.fields)
+        # a trailing delimiter gives an extra value: cut the rows to the
+        # table width
+        rows = map(itemgetter(slice(field_count)),
+                   read_csv_rows(stream, encoding, dialect))
+        typers = [field.type.get_typer() for field in table.fields]
+        typer_by_index = [(i, typer) for i, typer in enumerate(typers)
+                          if typer is not None]
+        if not typer_by_index:
+            self.insert_rows(table, rows)
+            return
+
+        def typed_batches():
+            # type the values column by column, skipping the untyped columns
+            for batch in self._batches(rows):
+                if any(len(row) != field_count for row in batch):
+                    # the transposition would cut every row to the
+                    # shortest one: type this batch row by row
+                    yield [tuple(value if typer is None else typer(value)
+                                 for typer, value in zip(typers, row))
+                           for row in batch]
+                    continue
+
+                columns = list(zip(*batch))
+                for i, typer in typer_by_index:
+                    columns[i] = map(typer, columns[i])
+                yield list(zip(*columns))
+
+        self._insert_batches(table, typed_batches())
 
     def insert_rows(self, table: SQLTable, rows: Iterable[Tuple]):
+        """
+        Insert the rows by batches of `query_provider.batch_size` rows.
+        """
+        self._insert_batches(table, self._batches(rows))
+
+    def _batches(self, rows: Iterable[Tuple]) -> Iterator[List[Tuple]]:
+        batch_size = self.query_provider.batch_size
+        it = iter(rows)
+        while True:
+            batch = list(islice(it, batch_size))
+            if not batch:
+                break
+            yield batch
+
+    def _insert_batches(self, table: SQLTable,
+                        batches: Iterable[List[Tuple]]):
         query = self.query_provider.insert_all(table)
-        self.executemany(query, rows)
+        for batch in batches:
+            self.executemany(query, batch)
 
     def finalize_copy(self, table: SQLTable):
         """
@@ -283,6 +342,48 @@ class QueryExecutor(ABC):
             self.execute(self.query_provider.create_index(table, index))
 
 
+def read_csv_rows(stream: BinaryIO, encoding: str, dialect: Dialect
+                  ) -> Iterator[List[str]]:
+    """
+    :param stream: the csv byte stream
+    :param encoding: the encoding of the stream
+    :param dialect: the csv dialect
+    :return: the rows of the stream, header excluded
+    """
+    text_stream = TextIOWrapper(stream, encoding=encoding, newline='')
+    try:
+        reader = csv_reader(text_stream, dialect)
+        next(reader, None)
+        yield from reader
+    finally:
+        # the underlying stream belongs to the caller
+        text_stream.detach()
+
+
+def _get_file_path(stream: BinaryIO) -> Optional[Path]:
+    """
+    :param stream: the stream
+    :return: the path of the file if the stream is a regular file opened at
+             the start, None otherwise.
+    """
+    if not isinstance(getattr(stream, "raw", stream), FileIO):
+        return None
+    name = stream.name
+    if not isinstance(name, str) or not stream.seekable():
+        return None
+    try:
+        stream_stat = os.fstat(stream.fileno())
+        name_stat = os.stat(name)
+    except OSError:
+        return None
+    if (not stat.S_ISREG(stream_stat.st_mode)
+            or (stream_stat.st_dev, stream_stat.st_ino)
+            != (name_stat.st_dev, name_stat.st_ino)
+            or stream.tell() != 0):
+        return None
+    return Path(name).absolute()
+
+
 class FakeAttr:
     def __init__(self, logger, obj, item):
         self._logger = logger
@@ -17,24 +17,39 @@
 #  this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #
-from codecs import getreader
-from csv import Dialect, reader as csv_reader
+from csv import Dialect
 from encodings import normalize_encoding
 from io import BytesIO
 from logging import Logger
 from pathlib import Path
 from typing import Iterable
 
-from datagouv_tools.sql.generic import (QueryProvider,
-                                        QueryExecutor, SQLIndex, SQLTable)
+from datagouv_tools.sql.generic import (QueryProvider, QueryExecutor,
+                                        SQLIndex, SQLTable, read_csv_rows)
 
 
 class MariaDBQueryProvider(QueryProvider):
+    def __init__(self, local_infile: bool = False):
+        """
+        :param local_infile: if True, the file is read by the client
+                             (`LOAD DATA LOCAL INFILE`) and doesn't have to
+                             be readable by the server.
+        """
+        self._local_infile = local_infile
+
+    @property
+    def local_infile(self) -> bool:
+        return self._local_infile
+
     def copy_path(self, table: SQLTable, path: Path, encoding: str,
                   dialect: Dialect) -> Iterable[str]:
         encoding = normalize_encoding(encoding).upper().replace("_", "")
+        if self._local_infile:
+            load_data = "LOAD DATA LOCAL INFILE"
+        else:
+            load_data = "LOAD DATA INFILE"
         lines = [
-            f"LOAD DATA INFILE '{path}'",
+            f"{load_data} '{path}'",
             f"INTO TABLE `{table.name}`",
             f"CHARACTER SET '{encoding}'",
             f"FIELDS TERMINATED BY '{dialect.delimiter}'",
@@ -53,6 +68,8 @@ class MariaDBQueryProvider(QueryProvider):
 
 
 class MariaDBQueryExecutor(QueryExecutor):
+    supports_path = True
+
     def __init__(self, logger: Logger, connection,
                  query_provider: MariaDBQueryProvider):
         self._logger = logger
@@ -80,16 +97,15 @@ class MariaDBQueryExecutor(QueryExecutor):
     def query_provider(self) -> MariaDBQueryProvider:
         return self._query_provider
 
+    def reads_path_on_client(self) -> bool:
+        return self._query_provider.local_infile
+
     def copy_path(self, table: SQLTable, path: Path, encoding: str,
-                  dialect: Dialect, count=0):
+                  dialect: Dialect):
         queries = self.query_provider.copy_path(table, path, encoding,
                                                 dialect)
         self.execute(queries)
 
     def insert_all(self, table: SQLTable, stream: BytesIO, encoding: str,
                    dialect: Dialect, count=0):
-        stream = getreader(encoding)(stream)
-        reader = csv_reader(stream, dialect)
-        next(reader)
-        query = self.query_provider.insert_all(table)
-        self.executemany(query, list(reader))
+        self.insert_rows(table, read_csv_rows(stream, encoding, dialect))
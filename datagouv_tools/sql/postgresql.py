@@ -20,7 +20,7 @@
 from csv import Dialect
 from encodings import normalize_encoding
 from logging import Logger
-from typing import Iterable, BinaryIO
+from typing import Iterable, BinaryIO, List, Tuple
 
 from datagouv_tools.sql.generic import (SQLIndex, QueryProvider,
                                         QueryExecutor, SQLTable)
@@ -35,6 +35,15 @@ class PostgreSQLQueryProvider(QueryProvider):
     def prepare_copy(self, table: SQLTable) -> Iterable[str]:
         return f'TRUNCATE {table.name}',
 
+    # override
+    def insert_all(self, table: SQLTable) -> str:
+        """
+        :return: a query that inserts a batch of rows passed as one array
+                 per column.
+        """
+        arrays = ", ".join(f"?::{field.type_str}[]" for field in table.fields)
+        return f'INSERT INTO {table.name} SELECT * FROM UNNEST({arrays})'
+
     def copy_stream(self, table: SQLTable, encoding: str,
                     dialect: Dialect) -> \
             Iterable[str]:
@@ -77,6 +86,8 @@ class PostgreSQLQueryProvider(QueryProvider):
 
 
 class PostgreSQLQueryExecutor(QueryExecutor):
+    supports_stream = True
+
     def __init__(self, logger: Logger, connection,
                  query_provider: PostgreSQLQueryProvider):
         self._logger = logger
@@ -108,9 +119,25 @@ class PostgreSQLQueryExecutor(QueryExecutor):
     def query_provider(self) -> QueryProvider:
         return self._query_provider
 
+    # override
+    def _insert_batches(self, table: SQLTable,
+                        batches: Iterable[List[Tuple]]):
+        if not table.fields:
+            return
+        query = self._query_provider.insert_all(table)
+        field_count = len(table.fields)
+        for batch in batches:
+            self._logger.debug("%s (%s rows)", query, len(batch))
+            if any(len(row) != field_count for row in batch):
+                # the transposition would silently cut every row
+                raise ValueError(
+                    f"Expected {field_count} values per row in {table.name}")
+            self._cursor.execute(query, [list(column)
+                                         for column in zip(*batch)])
+
     # override
     def copy_stream(self, table: SQLTable, stream: BinaryIO, encoding: str,
-                    dialect: Dialect, count=0):
+                    dialect: Dialect):
         queries = self._query_provider.copy_stream(table, encoding,
                                                    dialect)
         for query in queries:
@@ -40,6 +40,13 @@ class SQLType(ABC):
         """
         pass
 
+    def get_typer(self) -> Optional[Callable[[str], Any]]:
+        """
+        :return: the function that types a value, or None if the value is
+                 left as is.
+        """
+        return self.type_value
+
 
 class BasicSQLType(SQLType):
     """
@@ -70,6 +77,9 @@ class BasicSQLType(SQLType):
         else:
             return self._typer(value)
 
+    def get_typer(self) -> Optional[Callable[[str], Any]]:
+        return self._typer
+
     def __repr__(self):
         return f"BasicSQLType('{self._name}', {self._typer}, {self._suffix})"
 
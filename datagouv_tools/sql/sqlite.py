@@ -17,17 +17,18 @@
 #  this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #
-from codecs import getreader
-from csv import Dialect, reader as csv_reader
+from csv import Dialect
 from io import BytesIO
 from logging import Logger
 from typing import Iterable, Iterator, Tuple
 
-from datagouv_tools.sql.generic import (QueryProvider,
-                                        QueryExecutor, SQLTable)
+from datagouv_tools.sql.generic import (QueryProvider, QueryExecutor,
+                                        SQLTable, read_csv_rows)
 
 
 class SQLiteQueryExecutor(QueryExecutor):
+    supports_stream = True
+
     def __init__(self, logger: Logger, connection,
                  query_provider: QueryProvider):
         self._logger = logger
@@ -56,13 +57,10 @@ class SQLiteQueryExecutor(QueryExecutor):
         return self._query_provider
 
     def copy_stream(self, table: SQLTable, stream: BytesIO, encoding: str,
-                    dialect: Dialect, count=0):
+                    dialect: Dialect):
         # No bulk copy query in sqlite
         self.insert_all(table, stream, encoding, dialect)
 
     def insert_all(self, table: SQLTable, stream: BytesIO, encoding: str,
                    dialect: Dialect, count=0):
-        stream = getreader(encoding)(stream)
-        reader = csv_reader(stream, dialect)
-        next(reader)
-        self.insert_rows(table, reader)
+        self.insert_rows(table, read_csv_rows(stream, encoding, dialect))
@@ -135,7 +135,9 @@ class CSVStream(BytesIO):
         self._queue = queue
         self._encode = encode
         self._header = header
-        self._remaining_bytes = self._encode("\t".join(header) + "\n")[0]
+        # a memoryview: slicing the remaining bytes must not copy them
+        self._remaining_bytes = memoryview(
+            self._encode("\t".join(header) + "\n")[0])
         self._queue_ended = False
 
     def send(self, data):
@@ -151,6 +153,14 @@ class CSVStream(BytesIO):
             n = self.readinto(b)
             return b[:n]
 
+    # io.TextIOWrapper reads through read1: the inherited BytesIO.read1
+    # would read the (empty) BytesIO buffer and bypass the queue
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def readinto1(self, b):
+        return self.readinto(b)
+
     def readinto(self, b):
         i = len(self._remaining_bytes)
         len_b = len(b)
@@ -176,13 +186,24 @@ class CSVStream(BytesIO):
             if next_i >= len_b:
                 room_b = len_b - i
                 b[i:] = data[:room_b]
-                self._remaining_bytes = data[room_b:]
+                self._remaining_bytes = memoryview(data)[room_b:]
                 return len_b
             else:
                 b[i:next_i] = data
 
             i = next_i
 
+    def discard(self):
+        """
+        Consume and drop the remaining data until the end of the queue: the
+        producer must not be blocked on a full queue if the consumer stops
+        reading.
+        """
+        self._remaining_bytes = b''
+        while not self._queue_ended:
+            if self._queue.get() is None:
+                self._queue_ended = True
+
     def close(self):
         pass
 
@@ -18,10 +18,16 @@
 #
 #
 
+import os
+import tempfile
 import unittest
+from csv import unix_dialect
+from io import BytesIO
+from pathlib import Path
 
 from datagouv_tools.sql.generic import (QueryProvider, SQLTable, SQLField,
-                                        SQLIndex)
+                                        SQLIndex, read_csv_rows,
+                                        QueryExecutor, _get_file_path)
 from datagouv_tools.sql.sql_type import SQLTypes, SQLIndexTypes
 from datagouv_tools.util import to_snake
 
@@ -137,5 +143,81 @@ class SQLIndexTest(unittest.TestCase):
                          index.name)
 
 
+class ReadCSVRowsTest(unittest.TestCase):
+    def test_read_csv_rows(self):
+        stream = BytesIO('a,b\n"é",2\n3,4\n'.encode("utf-8"))
+        self.assertEqual([['é', '2'], ['3', '4']],
+                         list(read_csv_rows(stream, "utf-8", unix_dialect)))
+        self.assertFalse(stream.closed)
+
+
+class GetFilePathTest(unittest.TestCase):
+    def test_regular_file(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"data")
+            f.flush()
+            with open(f.name, "rb") as stream:
+                self.assertEqual(Path(f.name), _get_file_path(stream))
+                stream.read(1)
+                self.assertIsNone(_get_file_path(stream))
+
+    def test_bytes_io(self):
+        self.assertIsNone(_get_file_path(BytesIO(b"data")))
+
+    def test_pipe(self):
+        read_fd, write_fd = os.pipe()
+        os.close(write_fd)
+        with open(read_fd, "rb") as stream:
+            # like sys.stdin.buffer
+            stream.raw.name = "<stdin>"
+            self.assertIsNone(_get_file_path(stream))
+
+    def test_name_is_not_the_file(self):
+        with tempfile.NamedTemporaryFile() as f, \
+                tempfile.NamedTemporaryFile() as g:
+            with open(f.name, "rb") as stream:
+                stream.raw.name = g.name
+                self.assertIsNone(_get_file_path(stream))
+
+
+class ListQueryExecutor(QueryExecutor):
+    def __init__(self):
+        self.rows = []
+
+    def execute(self, queries, *args, **kwargs):
+        pass
+
+    def executemany(self, query, rows, *args, **kwargs):
+        self.rows.extend(rows)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    @property
+    def query_provider(self):
+        return QueryProvider()
+
+
+class InsertAllTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = ListQueryExecutor()
+        self.table = SQLTable("t", [SQLField("t", "f1", SQLTypes.INTEGER),
+                                    SQLField("t", "f2", SQLTypes.TEXT)], [])
+
+    def test_trailing_delimiter(self):
+        self.executor.insert_all(self.table, BytesIO(b"a,b,\n1,x,\n"),
+                                 "utf-8", unix_dialect)
+        self.assertEqual([(1, "x")], self.executor.rows)
+
+    def test_short_row(self):
+        self.executor.insert_all(self.table,
+                                 BytesIO(b"a,b\n1,x\n2\n3,z\n"),
+                                 "utf-8", unix_dialect)
+        self.assertEqual([(1, "x"), (2,), (3, "z")], self.executor.rows)
+
+
 if __name__ == '__main__':
     unittest.main()
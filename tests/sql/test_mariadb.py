@@ -18,11 +18,14 @@
 #
 #
 
+import tempfile
 import unittest
 from csv import unix_dialect
+from io import BytesIO
 from logging import Logger
 from pathlib import Path
 from sqlite3 import Connection, Cursor
+from unittest import mock
 from unittest.mock import Mock, call
 
 from datagouv_tools.sql.generic import SQLTable, SQLField, \
@@ -54,6 +57,17 @@ class TestMariaDBProvider(unittest.TestCase):
                                                        Path("path"),
                                                        "utf-8", unix_dialect))
 
+    def test_copy_local_path(self):
+        query_provider = MariaDBQueryProvider(local_infile=True)
+        self.assertEqual(("LOAD DATA LOCAL INFILE 'path'\n"
+                          'INTO TABLE `table`\n'
+                          "CHARACTER SET 'UTF8'\n"
+                          "FIELDS TERMINATED BY ','\n"
+                          'OPTIONALLY ENCLOSED BY \'"\'\n'
+                          'IGNORE 1 LINES',),
+                         query_provider.copy_path(self.table, Path("path"),
+                                                  "utf-8", unix_dialect))
+
     def test_create_other_index(self):
         self.table = SQLTable("other_table", [], [self.index])
         with self.assertRaises(AssertionError):
@@ -105,6 +119,43 @@ class TestMariaDBExecutor(unittest.TestCase):
         self.assertEqual([call.cursor(), call.commit()],
                          self.connection.mock_calls)
 
+    def test_copy_stream_file(self):
+        # the server reads the file: copy it to a file it can read
+        with tempfile.NamedTemporaryFile() as f:
+            with open(f.name, "rb") as stream:
+                self.executor.copy_stream(SQLTable("table", [], []), stream,
+                                          "utf-8", unix_dialect)
+            query = self.connection.mock_calls[1].args[0]
+            self.assertTrue(query.startswith("LOAD DATA INFILE '/"))
+            self.assertNotIn(f.name, query)
+
+    def test_copy_stream_local_file(self):
+        connection = Mock()
+        executor = MariaDBQueryExecutor(self.logger, connection,
+                                        MariaDBQueryProvider(True))
+        with tempfile.NamedTemporaryFile() as f:
+            with open(f.name, "rb") as stream:
+                executor.copy_stream(SQLTable("table", [], []), stream,
+                                     "utf-8", unix_dialect)
+            self.assertEqual([call.cursor(),
+                              call.cursor().execute(
+                                  f"LOAD DATA LOCAL INFILE '{f.name}'\n"
+                                  "INTO TABLE `table`\n"
+                                  "CHARACTER SET 'UTF8'\n"
+                                  "FIELDS TERMINATED BY ','\n"
+                                  "OPTIONALLY ENCLOSED BY '\"'\n"
+                                  "IGNORE 1 LINES")],
+                             connection.mock_calls)
+
+    def test_copy_stream_spill(self):
+        self.executor.copy_stream(SQLTable("table", [], []),
+                                  BytesIO(b"data"), "utf-8", unix_dialect)
+        self.assertEqual([call.cursor(), call.cursor().execute(mock.ANY)],
+                         self.connection.mock_calls)
+        query = self.connection.mock_calls[1].args[0]
+        self.assertTrue(query.startswith("LOAD DATA INFILE '/"))
+        self.assertTrue(".csv'" in query)
+
 
 if __name__ == '__main__':
     unittest.main()
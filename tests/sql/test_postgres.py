@@ -21,6 +21,7 @@
 import csv
 import unittest
 from copy import deepcopy
+from decimal import Decimal
 from io import BytesIO
 from logging import Logger
 from unittest import mock
@@ -72,6 +73,13 @@ class TestQueryProvider(unittest.TestCase):
                          self.provider.copy_stream(SQLTable("t", [], []),
                                                    "utf-8", dialect))
 
+    def test_insert_all(self):
+        self.assertEqual("INSERT INTO t SELECT * FROM "
+                         "UNNEST(?::text[], ?::numeric[])",
+                         self.provider.insert_all(
+                             SQLTable("t", [self.sql_field1, self.sql_field2],
+                                      [])))
+
     def test_finalize_copy(self):
         self.assertEqual(('ANALYZE t',),
                          self.provider.finalize_copy(SQLTable("t", [], [])))
@@ -155,6 +163,40 @@ class TestPostgreExecutor(unittest.TestCase):
                               stream=mock.ANY)],
                          self.connection.mock_calls)
 
+    def test_insert_all(self):
+        table = SQLTable("table", [SQLField("table", "f1", SQLTypes.TEXT),
+                                   SQLField("table", "f2", SQLTypes.NUMERIC)],
+                         [])
+        self.executor.insert_all(table, BytesIO(b"f1,f2\na,1.5\nb,2\n"),
+                                 "utf-8", csv.unix_dialect)
+        self.assertEqual([call.cursor(),
+                          call.cursor().execute(
+                              "INSERT INTO table SELECT * FROM "
+                              "UNNEST(?::text[], ?::numeric[])",
+                              [["a", "b"], [Decimal("1.5"), Decimal("2")]])],
+                         self.connection.mock_calls)
+
+    def test_insert_all_trailing_delimiter(self):
+        table = SQLTable("table", [SQLField("table", "f1", SQLTypes.INTEGER),
+                                   SQLField("table", "f2", SQLTypes.TEXT)],
+                         [])
+        self.executor.insert_all(table, BytesIO(b"a,b,\n1,x,\n2,y,\n"),
+                                 "utf-8", csv.unix_dialect)
+        self.assertEqual([call.cursor(),
+                          call.cursor().execute(
+                              "INSERT INTO table SELECT * FROM "
+                              "UNNEST(?::integer[], ?::text[])",
+                              [[1, 2], ["x", "y"]])],
+                         self.connection.mock_calls)
+
+    def test_insert_all_short_row(self):
+        table = SQLTable("table", [SQLField("table", "f1", SQLTypes.INTEGER),
+                                   SQLField("table", "f2", SQLTypes.TEXT)],
+                         [])
+        with self.assertRaises(ValueError):
+            self.executor.insert_all(table, BytesIO(b"a,b\n1,x\n2\n"),
+                                     "utf-8", csv.unix_dialect)
+
 
 if __name__ == '__main__':
     unittest.main()
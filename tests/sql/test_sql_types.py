@@ -43,6 +43,10 @@ class TestSQLTypes(unittest.TestCase):
                          SQLTypes.TIMESTAMP_WITHOUT_TIME_ZONE.type_value(
                              "2017-01-05 10:13:15"))
 
+    def test_get_typer(self):
+        self.assertIsNone(SQLTypes.TEXT.get_typer())
+        self.assertEqual(int, SQLTypes.INTEGER.get_typer())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -68,7 +68,8 @@ class TestSQLiteExecutor(unittest.TestCase):
                          self.connection.mock_calls)
 
     def test_copy_stream(self):
-        self.executor.copy_stream(SQLTable("table", [], []), BytesIO(b"data"),
+        self.executor.copy_stream(SQLTable("table", [], []),
+                                  BytesIO(b"header\ndata"),
                                   "utf-8", unix_dialect)
         self.assertEqual([call.debug('%s (%s, %s)',
                                      'INSERT INTO table VALUES ()', mock.ANY,
@@ -79,6 +80,21 @@ class TestSQLiteExecutor(unittest.TestCase):
                               'INSERT INTO table VALUES ()', mock.ANY)],
                          self.connection.mock_calls)
 
+    def test_insert_rows_batches(self):
+        self.query_provider.batch_size = 2
+        self.executor.insert_rows(SQLTable("table", [], []),
+                                  iter([(1,), (2,), (3,)]))
+        self.assertEqual([call.cursor(),
+                          call.cursor().executemany(
+                              'INSERT INTO table VALUES ()', [(1,), (2,)]),
+                          call.cursor().executemany(
+                              'INSERT INTO table VALUES ()', [(3,)])],
+                         self.connection.mock_calls)
+
+    def test_insert_rows_empty(self):
+        self.executor.insert_rows(SQLTable("table", [], []), iter([]))
+        self.assertEqual([call.cursor()], self.connection.mock_calls)
+
 
 if __name__ == '__main__':
     unittest.main()
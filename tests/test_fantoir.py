@@ -22,8 +22,9 @@ import unittest
 import zipfile
 from pathlib import Path
 
-from datagouv_tools.fantoir import parse, nature_voie, code_voie, \
-    CODE_BY_NATURE_VOIE, NATURE_VOIE_BY_CODE
+from datagouv_tools.fantoir import parse, parse_dicts, nature_voie, \
+    code_voie, CODE_BY_NATURE_VOIE, NATURE_VOIE_BY_CODE, COMMUNE_FORMAT, \
+    DIRECTION_FORMAT, RecordFormat, FantoirField
 
 
 class TestFantoir(unittest.TestCase):
@@ -66,6 +67,40 @@ class TestFantoir(unittest.TestCase):
                      '2', ' ', 'BELLEVUE'], list(r))
                 break
 
+    def test_parse_dicts(self):
+        data = zipfile.ZipFile(self.path).read("-").decode("ascii")
+        self.assertEqual([r.to_dict() for r in parse(io.StringIO(data))],
+                         list(parse_dicts(io.StringIO(data))))
+
+    def test_to_dict(self):
+        line = '010        AIN                                             '
+        self.assertEqual({'code_departement': '01', 'code_direction': '0',
+                          'libelle_direction': 'AIN' + ' ' * 27,
+                          'record_type': 'direction'},
+                         DIRECTION_FORMAT.to_dict(line))
+
+    def test_to_row(self):
+        line = ("010001    WL'ABERGEMENT-CLEMENCIAT        N  3      0000825"
+                "00000000000000 00000001987001\r")
+        self.assertEqual("01\t0\t001\tW\tL'ABERGEMENT-CLEMENCIAT\tN\t3\t"
+                         "\t0000825\t0000000\t0000000\t\t0000000\t1987001\n",
+                         COMMUNE_FORMAT.to_row(line))
+
+    def test_one_field_format(self):
+        record_format = RecordFormat("test", [
+            FantoirField(1, 2, "X", "Code département"),
+            FantoirField(3, 3, "X", "Filler", True)])
+        self.assertEqual(("01",), record_format.to_tuple("010AIN"))
+        self.assertEqual("01\n", record_format.to_row("010AIN"))
+        self.assertEqual({'code_departement': '01', 'record_type': 'test'},
+                         record_format.to_dict("010AIN"))
+
+    def test_no_field_format(self):
+        record_format = RecordFormat("test", [])
+        self.assertEqual((), record_format.to_tuple("010AIN"))
+        self.assertEqual({'record_type': 'test'},
+                         record_format.to_dict("010AIN"))
+
 
 if __name__ == '__main__':
     unittest.main()
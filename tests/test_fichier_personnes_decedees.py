@@ -17,12 +17,13 @@
 #  this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #
+import datetime as dt
 import sqlite3
 import unittest
 from pathlib import Path
 
 from datagouv_tools.fichier_personnes_decedees import InseeLineParser, \
-    import_deces
+    import_deces, LenientDate, Sex
 
 TEST_FILES_PATH = Path(__file__).parent.parent / "test_files"
 
@@ -43,6 +44,41 @@ class DecedeesTestCase(unittest.TestCase):
             for line in s:
                 d = InseeLineParser().parse(line)
 
+    def test_parse_nom_prenoms(self):
+        parser = InseeLineParser()
+        self.assertEqual(("DUPONT", ["JEAN", "PIERRE"]),
+                         parser._parse_nom_prenoms("DUPONT*JEAN PIERRE/"))
+        self.assertEqual(("DUPONT", ["JEAN"]),
+                         parser._parse_nom_prenoms("DUPONT*JEAN"))
+        self.assertEqual(("DUPONT", []), parser._parse_nom_prenoms("DUPONT"))
+        self.assertEqual(("DUPONT*/", []),
+                         parser._parse_nom_prenoms("DUPONT*/"))
+        self.assertEqual(("*JEAN/", []), parser._parse_nom_prenoms("*JEAN/"))
+        self.assertEqual(("DUPONT*JEAN/PIERRE/", []),
+                         parser._parse_nom_prenoms("DUPONT*JEAN/PIERRE/"))
+
+    def test_as_date(self):
+        self.assertEqual(dt.date(2020, 3, 14),
+                         LenientDate(2020, 3, 14).as_date())
+
+    def test_parse_sex(self):
+        parser = InseeLineParser()
+        self.assertIs(Sex.M, parser._parse_sex("1"))
+        self.assertIs(Sex.F, parser._parse_sex("2"))
+        self.assertIs(Sex.UNKNOWN, parser._parse_sex(" "))
+
+    def test_deces_repr(self):
+        d = InseeLineParser().parse("DUPONT*JEAN/".ljust(80) + "1" +
+                                    "19700231" + "75056")
+        self.assertEqual("Deces({'nom': 'DUPONT', 'prenoms': ['JEAN'], "
+                         "'sexe': <Sex.M: 1>, "
+                         "'date_naiss': LenientDate(1970, 2, 31), "
+                         "'code_lieu_naiss': '75056', 'commune_naiss': '', "
+                         "'pays_naiss': '', "
+                         "'date_deces': LenientDate(0, 0, 0), "
+                         "'code_lieu_deces': '', 'no_acte_deces': ''})",
+                         repr(d))
+
     def test_import_file(self):
         connection = sqlite3.connect("deces.db")
         rdbms = "sqlite"
@@ -18,11 +18,13 @@
 #  this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #
+import itertools
 import logging
 import sqlite3
+import threading
 import unittest
 from pathlib import Path
-from unittest.mock import Mock, call
+from unittest.mock import Mock, call, patch
 
 from datagouv_tools.import_fantoir import (import_fantoir,
                                            import_fantoir_thread)
@@ -58,6 +60,9 @@ class TestImportFantoir(unittest.TestCase):
         rdbms = "sqlite"
         fantoir_path = self.path
         import_fantoir(connection, fantoir_path, rdbms)
+        self.assertEqual(
+            [('01', '0', 'AIN')],
+            connection.execute("SELECT * FROM direction").fetchall())
         connection.close()
 
     def test_import_thread(self):
@@ -163,6 +168,44 @@ class TestImportFantoir(unittest.TestCase):
         import_fantoir(connection, fantoir_path, rdbms)
         connection.close()
 
+    def test_import_mariadb_local_infile(self):
+        logger = Mock()
+        import_fantoir(FakeConnection(logger), self.path, "mariadb",
+                       local_infile=True)
+        load_data_calls = [c for c in logger.mock_calls
+                           if "LOAD DATA" in str(c)]
+        self.assertEqual(3, len(load_data_calls))
+        for c in load_data_calls:
+            self.assertIn("LOAD DATA LOCAL INFILE", str(c))
+
+    def test_local_infile_unsupported(self):
+        with self.assertRaisesRegex(ValueError, "only available for MariaDB"):
+            import_fantoir(FakeConnection(Mock()), self.path, "sqlite",
+                           local_infile=True)
+        with self.assertRaisesRegex(ValueError, "only available for MariaDB"):
+            import_fantoir_thread(lambda: FakeConnection(Mock()), self.path,
+                                  "pg", local_infile=True)
+
+    def test_import_thread_error(self):
+        logger = Mock()
+        connection_indices = itertools.count()
+
+        def new_connection():
+            if next(connection_indices) == 3:
+                raise ConnectionError("no connection")
+            return FakeConnection(logger)
+
+        # small batches fill the queue of the failed consumer
+        with patch("datagouv_tools.import_fantoir.LINES_PER_BATCH", 1), \
+                patch("threading.excepthook"):
+            thread = threading.Thread(target=import_fantoir_thread, args=(
+                new_connection, self.path, "pg"), daemon=True)
+            thread.start()
+            thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(3, logger.mock_calls.count(
+            call.info('DRY RUN: connection.close()')))
+
     @unittest.skipIf(SKIP_IT, "integration test")
     def test_import_thread_pg(self):
         rdbms = "pg"
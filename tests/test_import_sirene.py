@@ -23,6 +23,8 @@
 #   This file is part of DataGouv Tools.
 
 # import SIRENE to PostgreSQL
+import io
+import itertools
 import sqlite3
 import unittest
 from logging import Logger
@@ -38,8 +40,11 @@ from datagouv_tools.import_sirene import (SireneSQLIndexProvider,
                                           NAME, TYPE, LENGTH,
                                           RANK,
                                           CAPTION,
-                                          import_sirene)
-from datagouv_tools.sql.generic import SQLField, SQLIndex
+                                          import_sirene,
+                                          import_sirene_thread)
+from datagouv_tools.import_sirene import (
+    PatchedPostgreSireneTypeToSQLTypeConverter, SchemaRow, read_schema_rows)
+from datagouv_tools.sql.generic import SQLField, SQLIndex, FakeConnection
 from datagouv_tools.sql.sql_type import SQLIndexTypes, SQLTypes
 
 SKIP_IT = True
@@ -87,6 +92,61 @@ class ImportSireneTest(unittest.TestCase):
     def test_dry_run(self):
         import_sirene(None, self.path, "postgresql")
 
+    def test_thread(self):
+        logger: Logger = Mock()
+        import_sirene_thread(lambda: FakeConnection(logger), self.path,
+                             "postgresql")
+
+        for table_name in ["stock_etablissement_historique",
+                           "stock_etablissement_liens_succession",
+                           "stock_etablissement", "stock_unite_legale",
+                           "stock_unite_legale_historique"]:
+            self.assertTrue(call.info(
+                f'DRY RUN: cursor.execute(ANALYZE {table_name}_reduit)')
+                            in logger.mock_calls)
+        self.assertEqual(5, logger.mock_calls.count(
+            call.info('DRY RUN: connection.close()')))
+
+    def test_thread_error(self):
+        logger: Logger = Mock()
+        connection_indices = itertools.count()
+
+        def new_connection():
+            if next(connection_indices) == 2:
+                raise ConnectionError("no connection")
+            return FakeConnection(logger)
+
+        with self.assertRaises(ConnectionError):
+            import_sirene_thread(new_connection, self.path, "postgresql")
+        self.assertEqual(4, logger.mock_calls.count(
+            call.info('DRY RUN: connection.close()')))
+
+    def test_unknown_rdbms(self):
+        with self.assertRaises(ValueError):
+            import_sirene(FakeConnection(Mock()), self.path, "foo")
+        with self.assertRaises(ValueError):
+            import_sirene_thread(lambda: FakeConnection(Mock()), self.path,
+                                 "sqlite")
+
+    def test_maria_local_infile(self):
+        logger: Logger = Mock()
+        import_sirene(FakeConnection(logger), self.path, "mariadb",
+                      local_infile=True)
+
+        load_data_calls = [c for c in logger.mock_calls
+                           if "LOAD DATA" in str(c)]
+        self.assertEqual(5, len(load_data_calls))
+        for c in load_data_calls:
+            self.assertIn("LOAD DATA LOCAL INFILE", str(c))
+
+    def test_local_infile_unsupported(self):
+        with self.assertRaisesRegex(ValueError, "only available for MariaDB"):
+            import_sirene(FakeConnection(Mock()), self.path, "postgresql",
+                          local_infile=True)
+        with self.assertRaisesRegex(ValueError, "only available for MariaDB"):
+            import_sirene_thread(lambda: FakeConnection(Mock()), self.path,
+                                 "postgresql", local_infile=True)
+
 
 class IndexProviderTest(unittest.TestCase):
     def setUp(self):
@@ -122,6 +182,23 @@ class IndexProviderTest(unittest.TestCase):
                                        SQLTypes.TEXT)
                               ])))
 
+    def test_index_provider_iterator(self):
+        self.assertEqual([SQLIndex(table_name='tableName',
+                                   field_name='siret',
+                                   type=SQLIndexTypes.HASH),
+                          SQLIndex(table_name='tableName',
+                                   field_name='fieldName',
+                                   type=SQLIndexTypes.B_TREE)],
+                         list(self.provider.get_indices(iter(
+                             [SQLField("tableName", "siret",
+                                       SQLTypes.TEXT),
+                              SQLField("tableName", "other",
+                                       SQLTypes.TEXT)
+                              ]))))
+
+    def test_index_provider_empty(self):
+        self.assertEqual([], list(self.provider.get_indices([])))
+
 
 class QueryExecutorTest(unittest.TestCase):
     def setUp(self):
@@ -172,22 +249,62 @@ class ParserTest(unittest.TestCase):
         p = SireneSchemaParser("t", [], self.type_provider,
                                self.index_provider)
         self.assertEqual("t", p.table_name)
-        self.assertEqual([], p.get_fields())
+        self.assertEqual((), p.get_fields())
         self.assertEqual([], list(p.get_indices()))
 
     def test_one_indexed(self):
         p = SireneSchemaParser("t", [
-            {NAME: "siren", TYPE: "Texte", LENGTH: "10", RANK: "1",
-             CAPTION: "c"}],
+            SchemaRow("t", "siren", "Texte", 10, 1, "c")],
                                self.type_provider,
                                self.index_provider)
         self.assertEqual("t", p.table_name)
         self.assertEqual(
-            [SQLField('t', 'siren', SQLTypes.TEXT, 1, 'c', 10)],
+            (SQLField('t', 'siren', SQLTypes.TEXT, 1, 'c', 10),),
             p.get_fields())
         self.assertEqual([SQLIndex('t', 'siren', SQLIndexTypes.HASH)],
                          list(p.get_indices()))
 
+    def test_get_table_is_memoized(self):
+        p = SireneSchemaParser("t", [
+            SchemaRow("t", "siren", "Texte", 10, 1, "c")],
+                               self.type_provider,
+                               self.index_provider)
+        table = p.get_table(str.upper)
+        self.assertIs(table, p.get_table(str.upper))
+        self.assertEqual("T", table.name)
+        self.assertEqual("t", p.get_table(str.lower).name)
+
+
+class ReadSchemaRowsTest(unittest.TestCase):
+    def test_read_schema_rows(self):
+        schema = io.StringIO(
+            f"{NAME},{LENGTH},{TYPE},{RANK},{CAPTION}\r\n"
+            "siren,9,Texte,1,Numéro Siren\r\n"
+            "dateCreationUniteLegale,10,Date,2,\"Date, création\"\r\n")
+        self.assertEqual([
+            SchemaRow("t", "siren", "Texte", 9, 1, "Numéro Siren"),
+            SchemaRow("t", "dateCreationUniteLegale", "Date", 10, 2,
+                      "Date, création")],
+            list(read_schema_rows("t", schema)))
+
+
+class TypeConverterTest(unittest.TestCase):
+    def test_patched(self):
+        converter = PatchedPostgreSireneTypeToSQLTypeConverter(
+            SQL_TYPE_BY_SIRENE_TYPE)
+        self.assertIs(SQLTypes.DATE, converter.get_type(
+            SchemaRow("StockUniteLegale", "dateCreationUniteLegale", "Date",
+                      10, 1, "")))
+        self.assertIs(SQLTypes.TEXT, converter.get_type(
+            SchemaRow("StockUniteLegale", "dateDernierTraitement", "Date",
+                      19, 2, "")))
+        self.assertIs(SQLTypes.NUMERIC, converter.get_type(
+            SchemaRow("StockUniteLegale", "numeroVoieEtablissement",
+                      "Numérique", 4, 3, "")))
+        self.assertIs(SQLTypes.TEXT, converter.get_type(
+            SchemaRow("StockEtablissement", "numeroVoieEtablissement",
+                      "Numérique", 4, 3, "")))
+
 
 if __name__ == "__main__":
     unittest.main()
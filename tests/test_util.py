@@ -17,9 +17,11 @@
 #  this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #
+import csv
 import queue
 import unittest
 
+from datagouv_tools.sql.generic import read_csv_rows
 from datagouv_tools.util import CSVStream
 
 
@@ -33,6 +35,36 @@ class TestUtil(unittest.TestCase):
         stream.readinto(ba)
         self.assertEqual(bytearray(b'56789'), ba)
 
+    def test_csv_stream_batches(self):
+        stream = CSVStream("test stream", ["a", "b", "c"], queue.Queue())
+        batch = "1\t2\t3\n" * 100
+        stream.send(batch)
+        stream.send(batch)
+        stream.send(None)
+        data = bytearray()
+        while True:
+            b = stream.read(7)
+            if not b:
+                break
+            data += b
+        self.assertEqual(("a\tb\tc\n" + batch * 2).encode("ascii"), data)
+
+    def test_csv_stream_discard(self):
+        stream = CSVStream("test stream", ["a", "b", "c"], queue.Queue(2))
+        stream.send("1\t2\t3\n")
+        stream.send(None)
+        stream.discard()
+        self.assertTrue(stream._queue.empty())
+        self.assertEqual(bytearray(b''), stream.read())
+
+    def test_read_csv_rows(self):
+        stream = CSVStream("test stream", ["a", "b", "c"], queue.Queue())
+        stream.send("1\t2\t3\n")
+        stream.send("4\t5\t6\n")
+        stream.send(None)
+        self.assertEqual([['1', '2', '3'], ['4', '5', '6']],
+                         list(read_csv_rows(stream, 'ascii', csv.excel_tab)))
+
 
 if __name__ == '__main__':
     unittest.main()